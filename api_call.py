@@ -1,21 +1,38 @@
 """Teleagriculture kits API client + CLI.
 
-Usage: python api_call.py --kit-id 1001 --format csv
+Usage: python api_call.py --kit-id 1001 --format parquet
 
 Env:
-    - KIT_API_KEY    optional Bearer token
-    - KITS_API_BASE  base URL (default https://kits.teleagriculture.org/api)
+    - KIT_API_KEY       optional Bearer token
+    - KITS_API_BASE     base URL (default https://kits.teleagriculture.org/api)
+    - KITS_HTTP_CACHE   directory for cached API pages and kit frames (default teleagriculture/.http_cache)
 """
 from __future__ import annotations
 
 import argparse
+import asyncio
+import hashlib
+import logging
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Optional
 
+import httpx
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
 
 # --- API configuration ---
 BASE_URL = os.getenv("KITS_API_BASE", "https://kits.teleagriculture.org/api")
@@ -27,82 +44,392 @@ HEADERS: dict[str, str] = {
 if KIT_API_KEY:
     HEADERS["Authorization"] = f"Bearer {KIT_API_KEY}"
 
-
-def get_kit_info(kit_id: int) -> Optional[dict]:
+# --- HTTP transport ---
+# transient statuses retried (with exponential backoff) by both HTTP clients
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.3
+
+# one pooled keep-alive session so repeated calls reuse TCP+TLS connections
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_ADAPTER = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        # hand the final response back instead of raising, callers branch on status
+        raise_on_status=False,
+    ),
+)
+# both schemes: KITS_API_BASE may point at a plain-http local/staging server
+SESSION.mount("https://", _ADAPTER)
+SESSION.mount("http://", _ADAPTER)
+
+# Typed layout of the measurements table; sensor names repeat on every row, so
+# they are dictionary-encoded (pandas Categorical after conversion)
+SCHEMA = pa.schema(
+    [
+        ("kit_id", pa.int64()),
+        ("sensor", pa.dictionary(pa.int32(), pa.string())),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("value", pa.float64()),
+        ("unit", pa.string()),
+    ]
+)
+_UNENCODED_SCHEMA = SCHEMA.set(1, pa.field("sensor", pa.string()))
+
+# --- Pagination ---
+# page sizes tried in order; larger pages amortize per-request overhead
+PAGE_SIZE_STEPS = (1000, 500, 100)
+# statuses meaning "page size too large" (only checked on the first page)
+PAGE_SIZE_REJECTED_STATUSES = (400, 413, 422)
+# largest page size the server accepted after a rejection, shared across walks
+_page_size_limit: Optional[int] = None
+# sensors paginated at once per kit; keeps bursts against the API bounded
+MAX_CONCURRENT_SENSORS = 8
+
+# --- HTTP cache configuration ---
+HTTP_CACHE_DIR = Path(os.getenv("KITS_HTTP_CACHE") or Path(__file__).parent / ".http_cache")
+HTTP_CACHE_TTL = 300  # seconds a cached page is served without revalidation
+FRAME_CACHE_TTL = 300  # seconds fetch_kit_dataframe reuses a kit's saved frame
+HTTP_CACHE_MAX_AGE = 288 * HTTP_CACHE_TTL  # page files untouched this long are deleted
+HTTP_CACHE_MAX_FILES = 4096  # newest page files kept on disk
+_last_page_cache_sweep = 0.0
+
+# successful kit metadata lookups, most recently used last
+_KIT_INFO_CACHE: "OrderedDict[int, dict]" = OrderedDict()
+_KIT_INFO_CACHE_SIZE = 64
+_KIT_INFO_CACHE_LOCK = threading.Lock()  # app handlers and the prefetch look kits up concurrently
+
+
+def get_kit_info(kit_id: int, *, use_cache: bool = True) -> Optional[dict]:
     """Fetch metadata for a kit (board).
 
-    Returns the JSON 'data' object or None if not found / error.
+    Successful lookups are memoized for the session. Returns the JSON 'data'
+    object or None if not found / error.
     """
+    if use_cache:
+        with _KIT_INFO_CACHE_LOCK:
+            if kit_id in _KIT_INFO_CACHE:
+                _KIT_INFO_CACHE.move_to_end(kit_id)
+                return _KIT_INFO_CACHE[kit_id]
+
     url = f"{BASE_URL}/kits/{kit_id}"
     try:
-        r = requests.get(url, headers=HEADERS, timeout=30)
-        if r.status_code == 200:
-            body = r.json()
-            return body.get("data")
-        return None
+        r = SESSION.get(url, timeout=30)
     except requests.RequestException:
+        return None  # connection-level failure that outlived the retries
+    if r.status_code != 200:
         return None
+    try:
+        body = orjson.loads(r.content)
+    except orjson.JSONDecodeError:
+        return None
+    data = body.get("data") if isinstance(body, dict) else None
+
+    if data is not None:
+        with _KIT_INFO_CACHE_LOCK:
+            _KIT_INFO_CACHE[kit_id] = data
+            _KIT_INFO_CACHE.move_to_end(kit_id)
+            if len(_KIT_INFO_CACHE) > _KIT_INFO_CACHE_SIZE:
+                _KIT_INFO_CACHE.popitem(last=False)
+    return data
+
+
+def _page_cache_path(url: str, params: dict) -> Path:
+    """On-disk location of the cached page for (url, params incl. cursor)."""
+    key = url + "?" + "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return HTTP_CACHE_DIR / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+
+def _page_cache_load(path: Path) -> Optional[dict]:
+    try:
+        return orjson.loads(path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def _page_cache_store(path: Path, entry: dict) -> None:
+    # write-then-rename so concurrent readers never see a partial file
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(orjson.dumps(entry))
+        os.replace(tmp, path)
+    except OSError:
+        return
+    _page_cache_sweep()
+
+
+def _page_cache_sweep() -> None:
+    """Drop stale page files and cap how many are kept, at most once per TTL."""
+    global _last_page_cache_sweep
+    now = time.time()
+    if now - _last_page_cache_sweep < HTTP_CACHE_TTL:
+        return
+    _last_page_cache_sweep = now
+    try:
+        files = sorted(
+            ((p.stat().st_mtime, p) for p in HTTP_CACHE_DIR.glob("*.json")),
+            reverse=True,
+        )
+        for i, (mtime, p) in enumerate(files):
+            if i >= HTTP_CACHE_MAX_FILES or now - mtime > HTTP_CACHE_MAX_AGE:
+                p.unlink(missing_ok=True)
+    except OSError:
+        pass
 
 
-def _paginate(
+async def _get_page(
+    client: httpx.AsyncClient,
+    url: str,
+    params: dict,
+    *,
+    use_cache: bool = True,
+) -> tuple[int, Optional[dict]]:
+    """GET one page and return (status, decoded JSON payload).
+
+    The payload is None on any error; status is 0 when the request itself failed.
+
+    With use_cache, pages younger than HTTP_CACHE_TTL are served from disk;
+    older ones are revalidated with If-None-Match / If-Modified-Since so an
+    unchanged page costs a 304 instead of a full download.
+    """
+    path = _page_cache_path(url, params) if use_cache else None
+    entry = _page_cache_load(path) if path is not None else None
+    if entry is not None and time.time() - entry.get("fetched_at", 0) < HTTP_CACHE_TTL:
+        return 200, entry["payload"]
+
+    headers = {}
+    if entry is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    # connect errors are retried by the transport; retry transient statuses here
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            r = await client.get(url, params=params, headers=headers)
+        except httpx.HTTPError:
+            return 0, None
+        if r.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            break
+        await asyncio.sleep(BACKOFF_FACTOR * 2**attempt)
+
+    if r.status_code == 304 and entry is not None:
+        payload = entry["payload"]
+    elif r.status_code == 200:
+        try:
+            payload = orjson.loads(r.content)
+        except orjson.JSONDecodeError:
+            return r.status_code, None
+        if path is not None:
+            entry = {
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "payload": payload,
+            }
+    else:
+        return r.status_code, None
+
+    if path is not None:
+        entry["fetched_at"] = time.time()
+        _page_cache_store(path, entry)
+    return r.status_code, payload
+
+
+async def _paginate_async(
+    client: httpx.AsyncClient,
     url: str,
     *,
     params: Optional[dict] = None,
-    headers: Optional[dict] = None,
-    page_size: int = 100,
+    page_size: int = PAGE_SIZE_STEPS[0],
     max_pages: int = 500,
-):
-    """Cursor pagination helper yielding lists of items from {'data': [...]} pages.
-
+    use_cache: bool = True,
+) -> list[list]:
+    """Cursor pagination helper collecting the item lists from {'data': [...]} pages.
+
+    If the server rejects the page size on the first request, steps down through
+    PAGE_SIZE_STEPS. A smaller size is remembered for later walks only once the
+    server has answered it with a JSON page, so rejections unrelated to the page
+    size (e.g. an unknown sensor) don't lower it for everyone.
     Stops when no next_cursor is provided or on any non-200/parse error.
     """
+    global _page_size_limit
+    size = min(page_size, _page_size_limit or page_size)
+    stepped_down = False
     q = dict(params or {})
-    q["page[size]"] = str(page_size)
     cursor = None
-    pages = 0
-    while pages < max_pages:
+    pages: list[list] = []
+    while len(pages) < max_pages:
+        q["page[size]"] = str(size)
         if cursor:
             q["page[cursor]"] = cursor
-        try:
-            r = requests.get(url, headers=headers, params=q, timeout=30)
-        except requests.RequestException:
-            break
-        if r.status_code != 200:
-            break
-        try:
-            payload = r.json()
-        except Exception:
+        status, payload = await _get_page(client, url, q, use_cache=use_cache)
+        if status in PAGE_SIZE_REJECTED_STATUSES and cursor is None:
+            smaller = [s for s in PAGE_SIZE_STEPS if s < size]
+            if smaller:
+                size = smaller[0]
+                stepped_down = True
+                continue
+        if payload is None:
             break
+        if stepped_down:
+            # the reduced size is confirmed to work; share it with later walks
+            _page_size_limit = min(size, _page_size_limit or size)
+            stepped_down = False
         data = payload.get("data")
-        meta = payload.get("meta", {})
-        yield data if isinstance(data, list) else []
-        cursor = meta.get("next_cursor")
-        pages += 1
+        if not data or not isinstance(data, list):
+            break  # an empty page ends the stream even if a cursor is returned
+        pages.append(data)
+        cursor = payload.get("meta", {}).get("next_cursor")
         if not cursor:
             break
+    return pages
+
+
+async def _fetch_sensor_pages(
+    kit_id: int,
+    sensor_list: List[str],
+    *,
+    page_size: int,
+    max_pages: int,
+    use_cache: bool = True,
+) -> list[list[list]]:
+    """Paginate all sensors of a kit concurrently over one shared HTTP/2 client.
+
+    At most MAX_CONCURRENT_SENSORS sensors are walked at a time. Returns one list
+    of pages per sensor, in the order of ``sensor_list``.
+    """
+    gate = asyncio.Semaphore(MAX_CONCURRENT_SENSORS)
+
+    async def _one(client: httpx.AsyncClient, sname: str) -> list[list]:
+        async with gate:
+            return await _paginate_async(
+                client,
+                f"{BASE_URL}/kits/{kit_id}/{sname}/measurements",
+                page_size=page_size,
+                max_pages=max_pages,
+                use_cache=use_cache,
+            )
+
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_connections=32),
+        retries=MAX_RETRIES,
+    )
+    async with httpx.AsyncClient(transport=transport, headers=HEADERS, timeout=30) as client:
+        return await asyncio.gather(*[_one(client, sname) for sname in sensor_list])
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
 
-def load_cached_kit_dataframe(kit_id: int, data_dir: Optional[Path] = None) -> pd.DataFrame:
+    Falls back to a worker thread when called from inside a running event loop
+    (e.g. Jupyter or an async Gradio handler), where asyncio.run() is not allowed.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, coro).result()
+
+
+def save_kit_dataset(df: pd.DataFrame, kit_id: int, base_dir: Optional[Path] = None) -> Path:
+    """Write measurements as a day-partitioned Parquet dataset.
+
+    Layout: <base_dir>/date=YYYY-MM-DD/*.parquet, base_dir defaulting to
+    data/kit_<id>/ where load_cached_kit_dataframe looks. Days present in df replace
+    their existing partitions; other days are kept, so repeated exports build
+    up history. Returns the dataset directory.
+    """
+    base_dir = Path(base_dir) if base_dir else Path(__file__).parent / "data" / f"kit_{kit_id}"
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.append_column("date", pc.strftime(table["timestamp"], format="%Y-%m-%d"))
+    ds.write_dataset(
+        table,
+        base_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+        existing_data_behavior="delete_matching",
+    )
+    return base_dir
+
+
+def _read_kit_dataset(path: Path, since: Optional[pd.Timestamp]) -> pd.DataFrame:
+    """Read a dataset written by save_kit_dataset, optionally only rows >= since.
+
+    The date partitions are pruned before any file is opened, and the timestamp
+    predicate is pushed down to the Parquet row groups.
+    """
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    flt = None
+    if since is not None:
+        flt = (ds.field("date") >= since.strftime("%Y-%m-%d")) & (
+            ds.field("timestamp") >= pa.scalar(since.to_pydatetime(), type=pa.timestamp("us", tz="UTC"))
+        )
+    columns = [c for c in SCHEMA.names if c in dataset.schema.names]
+    return dataset.to_table(filter=flt, columns=columns).to_pandas()
+
+
+def load_cached_kit_dataframe(
+    kit_id: int,
+    data_dir: Optional[Path] = None,
+    since: Optional[datetime] = None,
+) -> pd.DataFrame:
     """Load the most recent cached kit dataframe from data/ as a fallback.
 
-    Looks for files like data/kit_<id>_*.csv or .parquet. Returns empty DataFrame if none.
+    Prefers a day-partitioned dataset at data/kit_<id>/ (see save_kit_dataset),
+    then files like data/kit_<id>_*.parquet or .csv. With since, only rows at or
+    after that time are returned (naive datetimes are taken as UTC). Returns
+    empty DataFrame if none.
     """
     base = data_dir or (Path(__file__).parent / "data")
     if not base.exists():
         return pd.DataFrame(columns=["kit_id", "sensor", "timestamp", "value", "unit"])
 
-    candidates = list(base.glob(f"kit_{kit_id}_*.csv")) + list(base.glob(f"kit_{kit_id}_*.parquet"))
-    if not candidates:
-        return pd.DataFrame(columns=["kit_id", "sensor", "timestamp", "value", "unit"])
+    since_ts = None
+    if since is not None:
+        since_ts = pd.Timestamp(since)
+        since_ts = since_ts.tz_localize("UTC") if since_ts.tzinfo is None else since_ts.tz_convert("UTC")
 
-    # pick the most recently modified
-    path = max(candidates, key=lambda p: p.stat().st_mtime)
-    try:
-        if path.suffix == ".csv":
-            df = pd.read_csv(path)
-        else:
-            df = pd.read_parquet(path)
-    except Exception:
-        return pd.DataFrame(columns=["kit_id", "sensor", "timestamp", "value", "unit"])
+    dataset_dir = base / f"kit_{kit_id}"
+    if dataset_dir.is_dir():
+        try:
+            df = _read_kit_dataset(dataset_dir, since_ts)
+        except (OSError, pa.ArrowException):
+            return pd.DataFrame(columns=["kit_id", "sensor", "timestamp", "value", "unit"])
+    else:
+        # Parquet is preferred over CSV regardless of age: it reads much faster and
+        # only the needed columns are decoded
+        candidates = list(base.glob(f"kit_{kit_id}_*.parquet")) or list(base.glob(f"kit_{kit_id}_*.csv"))
+        if not candidates:
+            return pd.DataFrame(columns=["kit_id", "sensor", "timestamp", "value", "unit"])
+
+        # pick the most recently modified
+        path = max(candidates, key=lambda p: p.stat().st_mtime)
+        try:
+            if path.suffix == ".csv":
+                # only the schema columns, timestamps parsed during ingestion
+                df = pd.read_csv(
+                    path,
+                    usecols=lambda c: c in SCHEMA.names,
+                    parse_dates=["timestamp"],
+                    date_format="ISO8601",
+                    dtype={"sensor": "category"},
+                )
+            else:
+                df = pd.read_parquet(
+                    path,
+                    columns=["kit_id", "sensor", "timestamp", "value", "unit"],
+                    engine="pyarrow",
+                )
+        except Exception:
+            return pd.DataFrame(columns=["kit_id", "sensor", "timestamp", "value", "unit"])
 
     # normalize columns
     need_cols = {"kit_id", "sensor", "timestamp", "value", "unit"}
@@ -110,32 +437,113 @@ def load_cached_kit_dataframe(kit_id: int, data_dir: Optional[Path] = None) -> p
     for col in missing:
         df[col] = None
     df = df[["kit_id", "sensor", "timestamp", "value", "unit"]]
-    try:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
-        df = df.dropna(subset=["timestamp"])  # enforce valid timestamps
-        df["value"] = pd.to_numeric(df["value"], errors="coerce")
-        df["sensor"] = df["sensor"].astype(str)
-        df = df.sort_values(["sensor", "timestamp"], kind="stable")
-    except Exception:
-        pass
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True, format="ISO8601")
+    df = df.dropna(subset=["timestamp"])  # enforce valid timestamps
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    df["sensor"] = df["sensor"].astype("category")
+    if since_ts is not None:
+        df = df[df["timestamp"] >= since_ts]
+    df = df.sort_values(["sensor", "timestamp"], kind="stable")
     return df
 
 
+# tolerated alternative keys for measurement items, in priority order
+_TS_KEYS = ("timestamp", "time", "created_at", "datetime")
+_VALUE_KEYS = ("value", "reading", "measurement", "val")
+_UNIT_KEYS = ("unit", "units")
+
+
+def _first_present(d: dict, keys: tuple) -> Optional[str]:
+    """First key of ``keys`` whose value in ``d`` is not None."""
+    for k in keys:
+        if d.get(k) is not None:
+            return k
+    return None
+
+
+def _extract_measurement(item: dict) -> tuple:
+    """(timestamp, value, unit) of one item, tolerating common alternative keys.
+
+    Fields inside an 'attributes' sub-dict take precedence over top-level ones.
+    """
+    attrs = item.get("attributes")
+    if not isinstance(attrs, dict):
+        attrs = {}
+
+    def pick(keys: tuple):
+        if attrs.get(keys[0]) is not None:
+            return attrs[keys[0]]
+        k = _first_present(item, keys)
+        return item[k] if k is not None else None
+
+    return pick(_TS_KEYS), pick(_VALUE_KEYS), pick(_UNIT_KEYS)
+
+
+def _detect_layout(item: dict) -> tuple:
+    """Key layout (nested, ts_key, val_key, unit_key) of a measurement item.
+
+    Detected once per sensor stream so the row loop can use direct lookups
+    instead of walking the whole key ladder for every item.
+    """
+    attrs = item.get("attributes")
+    if isinstance(attrs, dict) and attrs.get("timestamp") is not None and attrs.get("value") is not None:
+        return True, "timestamp", "value", "unit"
+    return (
+        False,
+        _first_present(item, _TS_KEYS) or _TS_KEYS[0],
+        _first_present(item, _VALUE_KEYS) or _VALUE_KEYS[0],
+        _first_present(item, _UNIT_KEYS) or _UNIT_KEYS[0],
+    )
+
+
+def _measurements_table(
+    kit_id: int,
+    sensor_col: list,
+    ts_col: list,
+    val_col: list,
+    unit_col: list,
+) -> pa.Table:
+    """Build the typed measurements table (see SCHEMA) from per-column lists.
+
+    Timestamps and values are coerced column-wise (unparseable values become
+    nulls), rows without a valid timestamp are dropped, and the result is sorted
+    by (sensor, timestamp) in Arrow.
+    """
+    ts = pd.to_datetime(pd.Series(ts_col, dtype=object), errors="coerce", utc=True, format="ISO8601")
+    value = pd.to_numeric(pd.Series(val_col, dtype=object), errors="coerce")
+    table = pa.Table.from_pydict(
+        {
+            "kit_id": pa.repeat(pa.scalar(kit_id, pa.int64()), len(ts_col)),
+            "sensor": sensor_col,
+            "timestamp": pa.Array.from_pandas(ts, type=SCHEMA.field("timestamp").type),
+            "value": pa.Array.from_pandas(value.astype("float64"), type=pa.float64()),
+            "unit": unit_col,
+        },
+        schema=_UNENCODED_SCHEMA,
+    )
+    table = table.filter(pc.is_valid(table["timestamp"]))
+    # Arrow cannot sort on dictionary columns, so encode sensor after sorting
+    table = table.sort_by([("sensor", "ascending"), ("timestamp", "ascending")])
+    return table.cast(SCHEMA)
+
+
 def get_kit_measurements_df(
     kit_id: int,
     sensors: Optional[list[str]] | None = None,
     *,
-    page_size: int = 100,
+    page_size: int = PAGE_SIZE_STEPS[0],
     max_pages: int = 500,
+    use_cache: bool = True,
 ) -> pd.DataFrame:
     """Return a concise DataFrame for the kit's sensors.
 
     Columns: [kit_id, sensor, timestamp, value, unit]
+    Set use_cache=False to bypass the on-disk HTTP page cache.
     """
     # discover sensors if not provided
     sensor_list: List[str] = [s for s in (sensors or []) if s]
     if not sensor_list:
-        kit = get_kit_info(kit_id) or {}
+        kit = get_kit_info(kit_id, use_cache=use_cache) or {}
         sensor_list = [
             (s.get("name") or s.get("slug") or s.get("sensor"))
             for s in (kit.get("sensors") or [])
@@ -149,52 +557,50 @@ def get_kit_measurements_df(
     if not sensor_list:
         sensor_list = ["ftTemp", "gbHum", "NH3", "C3H8", "CO"]
 
-    rows: list[dict] = []
-    for sname in sensor_list:
-        endpoint = f"{BASE_URL}/kits/{kit_id}/{sname}/measurements"
-        for page in _paginate(endpoint, headers=HEADERS, page_size=page_size, max_pages=max_pages):
+    # all sensor streams paginate concurrently; parsing below stays sequential
+    sensor_pages = _run_sync(
+        _fetch_sensor_pages(
+            kit_id,
+            sensor_list,
+            page_size=page_size,
+            max_pages=max_pages,
+            use_cache=use_cache,
+        )
+    )
+
+    # accumulate column-wise (no per-row dict); kit_id is constant and filled in Arrow
+    sensor_col: list = []
+    ts_col: list = []
+    val_col: list = []
+    unit_col: list = []
+    for sname, pages in zip(sensor_list, sensor_pages):
+        layout = None  # key layout of this sensor's items, detected on the first one
+        for page in pages:
             for item in page:
                 if not isinstance(item, dict):
                     continue
-                attrs = item.get("attributes") or {}
-                # tolerate common alternative keys while keeping output schema tight
-                ts = (
-                    attrs.get("timestamp")
-                    or item.get("timestamp")
-                    or item.get("time")
-                    or item.get("created_at")
-                    or item.get("datetime")
-                )
-                val = (
-                    attrs.get("value")
-                    or item.get("value")
-                    or item.get("reading")
-                    or item.get("measurement")
-                    or item.get("val")
-                )
-                unit = attrs.get("unit") or item.get("unit") or item.get("units")
+                if layout is None:
+                    layout = _detect_layout(item)
+                nested, ts_key, val_key, unit_key = layout
+                src = item.get("attributes") if nested else item
+                if isinstance(src, dict):
+                    ts, val, unit = src.get(ts_key), src.get(val_key), src.get(unit_key)
+                else:
+                    ts = val = unit = None
                 if ts is None or val is None:
-                    continue
-                rows.append(
-                    {
-                        "kit_id": kit_id,
-                        "sensor": sname,
-                        "timestamp": ts,
-                        "value": val,
-                        "unit": unit,
-                    }
-                )
-    df = pd.DataFrame(rows, columns=["kit_id", "sensor", "timestamp", "value", "unit"])
-    if not df.empty:
-        try:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
-            df = df.dropna(subset=["timestamp"])  # enforce valid timestamps
-            # numeric value if possible (keeps visualization robust)
-            df["value"] = pd.to_numeric(df["value"], errors="coerce")
-            df["sensor"] = df["sensor"].astype(str)
-            df = df.sort_values(["sensor", "timestamp"], kind="stable")
-        except Exception:
-            pass
+                    # item deviates from the detected layout; walk the full key ladder
+                    ts, val, unit = _extract_measurement(item)
+                    if ts is None or val is None:
+                        continue
+                sensor_col.append(sname)
+                ts_col.append(ts)
+                val_col.append(val)
+                unit_col.append(None if unit is None else str(unit))
+    # self_destruct frees each Arrow column as it is converted, so peak memory is
+    # about one copy of the data rather than two
+    df = _measurements_table(kit_id, sensor_col, ts_col, val_col, unit_col).to_pandas(
+        split_blocks=True, self_destruct=True
+    )
     # Fallback to cached data if API yielded nothing
     if df.empty:
         cached = load_cached_kit_dataframe(kit_id)
@@ -203,12 +609,41 @@ def get_kit_measurements_df(
     return df
 
 
-def fetch_kit_dataframe(kit_id: int) -> pd.DataFrame:
+def fetch_kit_dataframe(kit_id: int, *, use_cache: bool = True) -> pd.DataFrame:
     """Simplest API: return all measurements for the given kit as a DataFrame.
 
-    Equivalent to get_kit_measurements_df(kit_id) with sensible defaults.
+    Equivalent to get_kit_measurements_df(kit_id) with sensible defaults. With
+    use_cache, the finished frame is kept as Parquet in HTTP_CACHE_DIR and
+    reused for FRAME_CACHE_TTL seconds, skipping pagination and parsing entirely.
     """
-    return get_kit_measurements_df(kit_id)
+    path = HTTP_CACHE_DIR / f"kit_{kit_id}.parquet"
+    if use_cache:
+        try:
+            if time.time() - path.stat().st_mtime < FRAME_CACHE_TTL:
+                return pd.read_parquet(path, engine="pyarrow")
+        except (OSError, pa.ArrowException):
+            pass  # missing or unreadable: fetch afresh
+
+    df = get_kit_measurements_df(kit_id, use_cache=use_cache)
+    if not df.empty:
+        try:
+            HTTP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            df.to_parquet(tmp, engine="pyarrow", compression="snappy", index=False)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    return df
+
+
+def _page_size_arg(value: str) -> int:
+    # 'auto' starts at the largest step; rejections negotiate it down
+    if value == "auto":
+        return PAGE_SIZE_STEPS[0]
+    try:
+        return int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected an integer or 'auto', got {value!r}")
 
 
 def parse_args() -> argparse.Namespace:
@@ -220,24 +655,43 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Comma-separated sensor names to limit (default: discover all sensors on the kit)",
     )
-    p.add_argument("--page-size", type=int, default=100, help="Page size for pagination (default: 100)")
+    p.add_argument(
+        "--page-size",
+        type=_page_size_arg,
+        default="auto",
+        help=(
+            "Page size for pagination, or 'auto' for the largest size the server accepts "
+            f"(tries {', '.join(map(str, PAGE_SIZE_STEPS))}; default: auto)"
+        ),
+    )
     p.add_argument(
         "--max-pages",
         type=int,
         default=500,
         help="Maximum number of pages to paginate per sensor (default: 500)",
     )
+    p.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk HTTP page cache and re-download every page",
+    )
     p.add_argument(
         "--format",
-        choices=["csv", "parquet"],
-        default="csv",
-        help="Output format (default: csv)",
+        choices=["csv", "parquet", "dataset"],
+        default="parquet",
+        help=(
+            "Output format (default: parquet). 'dataset' writes a day-partitioned "
+            "Parquet dataset that cached loads can filter by time"
+        ),
     )
     p.add_argument(
         "--out",
         type=str,
         default=None,
-        help="Output file path. If not provided, saves under teleagriculture/data/kit_<id>_<YYYY-MM-DD>.<ext>",
+        help=(
+            "Output file path. If not provided, saves under teleagriculture/data/kit_<id>_<YYYY-MM-DD>.<ext> "
+            "(or the directory teleagriculture/data/kit_<id>/ for --format dataset)"
+        ),
     )
     return p.parse_args()
 
@@ -249,15 +703,29 @@ def main() -> int:
     if args.sensors:
         sensors = [s.strip() for s in args.sensors.split(",") if s.strip()]
 
-    print(f"API base: {BASE_URL}")
-    print(f"Fetching kit {args.kit_id} measurements...")
-    df = get_kit_measurements_df(
-        args.kit_id,
-        sensors=sensors,
-        page_size=args.page_size,
-        max_pages=args.max_pages,
-    )
-    print(f"Fetched rows: {len(df)}")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    logger.info("API base: %s", BASE_URL)
+    logger.info("Fetching kit %s measurements...", args.kit_id)
+    try:
+        df = get_kit_measurements_df(
+            args.kit_id,
+            sensors=sensors,
+            page_size=args.page_size,
+            max_pages=args.max_pages,
+            use_cache=not args.no_cache,
+        )
+    except (requests.RequestException, httpx.HTTPError, ValueError) as e:
+        logger.error("Fetching kit %s failed: %s", args.kit_id, e)
+        return 1
+    # one summary record instead of a line per sensor
+    per_sensor = df["sensor"].value_counts(sort=False).to_dict() if not df.empty else {}
+    logger.info("Fetched rows: %d; rows per sensor: %s", len(df), per_sensor)
+
+    if args.format == "dataset":
+        out_dir = save_kit_dataset(df, args.kit_id, Path(args.out) if args.out else None)
+        logger.info("Saved Parquet dataset -> %s", out_dir.resolve())
+        return 0
 
     # Determine output path
     ext = args.format
@@ -272,16 +740,16 @@ def main() -> int:
 
     if args.format == "csv":
         df.to_csv(out_path, index=False)
-        print(f"\nSaved CSV -> {out_path.resolve()}")
+        logger.info("Saved CSV -> %s", out_path.resolve())
     elif args.format == "parquet":
         try:
-            df.to_parquet(out_path, index=False)
-            print(f"\nSaved Parquet -> {out_path.resolve()}")
+            df.to_parquet(out_path, index=False, compression="snappy", engine="pyarrow")
+            logger.info("Saved Parquet -> %s", out_path.resolve())
         except ImportError:
-            print("\nParquet write failed. Please install pyarrow or fastparquet.")
+            logger.error("Parquet write failed. Please install pyarrow or fastparquet.")
             return 1
         except Exception as e:
-            print(f"\nAn error occurred while saving the Parquet file: {e}")
+            logger.error("An error occurred while saving the Parquet file: %s", e)
             return 1
     
     return 0
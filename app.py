@@ -1,3 +1,8 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+import os
+import threading
 from typing import Tuple, Optional
 from PIL import Image, ImageDraw, ImageFont
 import pandas as pd
@@ -6,19 +11,50 @@ import pandas as pd
 WEATHER_PNG_PATH = None  # disk fallback removed
 GENERATED_PNG_PATH = None  # disk fallback removed
 
-def _placeholder_image(size: Tuple[int, int], text: str, bg=(230, 230, 230)) -> Image.Image:
+# Longest side of the weather plot sent to GenAI; image tokens and upload size
+# scale with pixel count and 512 px is plenty to guide the stylization
+GENAI_GUIDE_SIZE = int(os.getenv("GENAI_GUIDE_SIZE", "512"))
+
+# GenAI results keyed by the data they were generated from; most recently used last
+_GENAI_CACHE: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_GENAI_CACHE_SIZE = 32
+# Rendered weather plots under the same keys; refreshing unchanged data skips matplotlib
+_PLOT_CACHE: "OrderedDict[tuple, Image.Image]" = OrderedDict()
+_PLOT_CACHE_SIZE = 8
+_CACHE_LOCK = threading.Lock()  # the startup prefetch writes from another thread
+# GenAI generations currently running, by cache key; later callers wait on these
+_GENAI_INFLIGHT: "dict[tuple, Future]" = {}
+
+DEFAULT_KIT_ID = 1001
+PREFETCH_INTERVAL = 24 * 60 * 60  # seconds between background refreshes of the default kit
+# GENAI_PREFETCH=0 skips the background GenAI warm-up (e.g. in dev or CI)
+PREFETCH_ENABLED = os.getenv("GENAI_PREFETCH", "1") != "0"
+_prefetch_started = threading.Event()  # one prefetch loop per process, however many apps
+# Events Gradio may run at once; its default of 1 makes every visitor wait for
+# the previous one's multi-second GenAI call
+HANDLER_CONCURRENCY = int(os.getenv("GRADIO_CONCURRENCY", "8"))
+
+try:
+    _FONT = ImageFont.load_default()
+except Exception:
+    _FONT = None
+
+
+@lru_cache(maxsize=16)
+def _placeholder_template(size: Tuple[int, int], text: str, bg) -> Image.Image:
     # Always create a simple placeholder; don't try to read a file here
     img = Image.new("RGB", size, color=bg)
     draw = ImageDraw.Draw(img)
-    try:
-        font = ImageFont.load_default()
-    except Exception:
-        font = None
-    w, h = draw.textbbox((0, 0), text, font=font)[2:]
-    draw.text(((size[0] - w) / 2, (size[1] - h) / 2), text, fill=(80, 80, 80), font=font)
+    w, h = draw.textbbox((0, 0), text, font=_FONT)[2:]
+    draw.text(((size[0] - w) / 2, (size[1] - h) / 2), text, fill=(80, 80, 80), font=_FONT)
     return img
 
 
+def _placeholder_image(size: Tuple[int, int], text: str, bg=(230, 230, 230)) -> Image.Image:
+    # Copy so callers can't modify the cached template
+    return _placeholder_template(tuple(size), text, tuple(bg)).copy()
+
+
 def load_weather_plot(
     size: Tuple[int, int] = (1024, 1024),
     kit_id: Optional[int] = None,
@@ -27,16 +63,22 @@ def load_weather_plot(
     """Load the weather plot image for a given kit.
 
     Tries to generate in-memory via weather_data_visualisation(); falls back to
-    a placeholder if unavailable.
+    a placeholder if unavailable. Plots are reused while the kit's data is unchanged.
     """
+    key = _data_cache_key(size, kit_id, df)
+    cached = _lru_get(_PLOT_CACHE, key)
+    if cached is not None:
+        return cached
+
     try:
         # Prefer calling the function to get a PIL image directly
         from weather_data_visualisation import weather_data_visualisation
 
-        img = weather_data_visualisation(kit=kit_id, df=df, save_to_disk=False)
+        img = weather_data_visualisation(kit=kit_id, df=df, save_to_disk=False, size=size)
         if isinstance(img, Image.Image):
             if img.size != size:
-                img = img.resize(size, Image.LANCZOS)
+                img = img.resize(size, Image.BILINEAR)
+            _lru_put(_PLOT_CACHE, _PLOT_CACHE_SIZE, key, img)
             return img
     except Exception as e:
         print(f"Weather plot generation failed: {e}")
@@ -44,34 +86,143 @@ def load_weather_plot(
     return _placeholder_image(size, "Weather plot unavailable")
 
 
-def load_genai_output(
+def _data_cache_key(
+    size: Tuple[int, int],
+    kit_id: Optional[int],
+    df: Optional[pd.DataFrame],
+) -> Optional[tuple]:
+    """Identify a render (plot or GenAI) by size, kit, newest timestamp and row count.
+
+    Returns None when there is no data to key on (nothing is cached then).
+    """
+    if df is None or getattr(df, "empty", True) or "timestamp" not in df.columns:
+        return None
+    return (tuple(size), kit_id, int(pd.Timestamp(df["timestamp"].max()).value), len(df))
+
+
+def _lru_get(cache: OrderedDict, key: Optional[tuple]) -> Optional[Image.Image]:
+    if key is None:
+        return None
+    with _CACHE_LOCK:
+        if key not in cache:
+            return None
+        cache.move_to_end(key)
+        return cache[key]
+
+
+def _lru_put(cache: OrderedDict, maxsize: int, key: Optional[tuple], img: Image.Image) -> None:
+    if key is None:
+        return
+    with _CACHE_LOCK:
+        cache[key] = img
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+
+
+def _genai_cache_get(key: Optional[tuple]) -> Optional[Image.Image]:
+    return _lru_get(_GENAI_CACHE, key)
+
+
+def _genai_cache_put(key: Optional[tuple], img: Image.Image) -> None:
+    _lru_put(_GENAI_CACHE, _GENAI_CACHE_SIZE, key, img)
+
+
+def _genai_claim(key: Optional[tuple]) -> Tuple[Optional[Future], bool]:
+    """Return (future, owner) for a generation of key.
+
+    owner is True when the caller must generate and resolve the future;
+    otherwise the future belongs to a generation that is already running.
+    """
+    if key is None:
+        return None, True
+    with _CACHE_LOCK:
+        fut = _GENAI_INFLIGHT.get(key)
+        if fut is not None:
+            return fut, False
+        fut = _GENAI_INFLIGHT[key] = Future()
+        return fut, True
+
+
+def load_genai_output_from_image(
+    base_img: Optional[Image.Image],
     size: Tuple[int, int] = (1024, 1024),
-    kit_id: Optional[int] = None,
-    df: Optional[pd.DataFrame] = None,
+    cache_key: Optional[tuple] = None,
 ) -> Image.Image:
-    """Load the GenAI output image for a given kit if available; otherwise a placeholder.
+    """Load the GenAI output guided by an already rendered weather plot.
 
-    Uses the selected kit's weather plot as the guiding input for the GenAI image.
+    Falls back to a placeholder if generation fails. Pass cache_key (see
+    _data_cache_key) to reuse results while the kit's data is unchanged; a
+    call for a key that is already being generated (e.g. by the startup
+    prefetch) waits for that result instead of paying for a second one.
     """
+    cached = _genai_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    fut, owner = _genai_claim(cache_key)
+    if not owner:
+        img = fut.result()
+        return img if img is not None else _placeholder_image(size, "GenAI image pending")
+
+    img = None
     try:
-        from genai import generate_genai_image
+        # the previous owner may have finished between the cache check and the claim
+        img = _genai_cache_get(cache_key) or _generate_genai_output(base_img, size, cache_key)
+    finally:
+        if fut is not None:
+            with _CACHE_LOCK:
+                del _GENAI_INFLIGHT[cache_key]
+            fut.set_result(img)
+    return img if img is not None else _placeholder_image(size, "GenAI image pending")
 
-        # Provide the latest weather image if possible to guide the GenAI
-        base_img = None
-        try:
-            base_img = load_weather_plot(size, kit_id=kit_id, df=df)
-        except Exception:
-            base_img = None
 
-        img = generate_genai_image(input_image=base_img, save_to_disk=False)
+def _generate_genai_output(
+    base_img: Optional[Image.Image],
+    size: Tuple[int, int],
+    cache_key: Optional[tuple],
+) -> Optional[Image.Image]:
+    # One paid GenAI call; None when generation fails
+    try:
+        from genai import generate_genai_image
+
+        guide = base_img
+        if guide is not None and max(guide.size) > GENAI_GUIDE_SIZE:
+            # Only steers the model, so a cheap filter is enough; reducing_gap lets
+            # Pillow box-reduce by an integer factor before filtering
+            guide = guide.copy()
+            guide.thumbnail((GENAI_GUIDE_SIZE, GENAI_GUIDE_SIZE), Image.BILINEAR, reducing_gap=2.0)
+        img = generate_genai_image(input_image=guide, save_to_disk=False)
         if isinstance(img, Image.Image):
             if img.size != size:
                 img = img.resize(size, Image.LANCZOS)
+            _genai_cache_put(cache_key, img)
             return img
     except Exception as e:
         print(f"genai.py not usable yet: {e}")
+    return None
+
+
+def load_genai_output(
+    size: Tuple[int, int] = (1024, 1024),
+    kit_id: Optional[int] = None,
+    df: Optional[pd.DataFrame] = None,
+) -> Image.Image:
+    """Load the GenAI output image for a given kit if available; otherwise a placeholder.
+
+    Uses the selected kit's weather plot as the guiding input for the GenAI image.
+    Results are reused while the kit's data is unchanged.
+    """
+    key = _data_cache_key(size, kit_id, df)
+    cached = _genai_cache_get(key)
+    if cached is not None:
+        return cached
 
-    return _placeholder_image(size, "GenAI image pending")
+    # Provide the latest weather image if possible to guide the GenAI
+    try:
+        base_img = load_weather_plot(size, kit_id=kit_id, df=df)
+    except Exception:
+        base_img = None
+    return load_genai_output_from_image(base_img, size, cache_key=key)
 
 
 def get_both_images(
@@ -79,16 +230,43 @@ def get_both_images(
     df: Optional[pd.DataFrame] = None,
     size: Tuple[int, int] = (1024, 1024),
 ) -> Tuple[Image.Image, Image.Image]:
+    # Render the weather plot once and reuse it as the GenAI guide image
     left = load_weather_plot(size, kit_id=kit_id, df=df)
-    right = load_genai_output(size, kit_id=kit_id, df=df)
+    right = load_genai_output_from_image(left, size, cache_key=_data_cache_key(size, kit_id, df))
     return left, right
 
 
+def _prefetch_default_kit(interval: Optional[float] = PREFETCH_INTERVAL) -> None:
+    """Render both images for the default kit so the first page load hits the cache.
+
+    Fetches the same data the UI's initial load does, then reschedules itself
+    every interval seconds (None: run once). Meant to run off the main thread.
+    """
+    try:
+        from api_call import get_kit_measurements_df
+
+        df = get_kit_measurements_df(DEFAULT_KIT_ID, page_size=60, max_pages=2)
+        if df is not None and not df.empty:
+            get_both_images(DEFAULT_KIT_ID, df)
+    except Exception as e:
+        print(f"GenAI prefetch failed: {e}")
+    finally:
+        if interval:
+            timer = threading.Timer(interval, _prefetch_default_kit, kwargs={"interval": interval})
+            timer.daemon = True
+            timer.start()
+
+
 def create_app():
     """Creates and returns the Gradio app with two side-by-side images."""
     import gradio as gr
     import pandas as pd
 
+    # Warm the GenAI cache for the default kit while the UI starts up
+    if PREFETCH_ENABLED and not _prefetch_started.is_set():
+        _prefetch_started.set()
+        threading.Thread(target=_prefetch_default_kit, daemon=True).start()
+
     with gr.Blocks(title="Weather × GenAI") as app:
         gr.Markdown("# Weather visualization and GenAI output")
         
@@ -96,7 +274,7 @@ def create_app():
         df_state = gr.State()
 
         with gr.Row():
-            kit_input = gr.Number(label="Kit ID", value=1001, precision=0)
+            kit_input = gr.Number(label="Kit ID", value=DEFAULT_KIT_ID, precision=0)
         with gr.Row():
             left_img = gr.Image(label="Weather plot", type="pil")
             right_img = gr.Image(label="GenAI output", type="pil")
@@ -112,12 +290,12 @@ def create_app():
             try:
                 from api_call import get_kit_measurements_df
 
-                kit = 1001
+                kit = DEFAULT_KIT_ID
                 if kit_id is not None:
                     try:
                         kit = int(kit_id)
                     except Exception:
-                        kit = 1001
+                        kit = DEFAULT_KIT_ID
 
                 df = get_kit_measurements_df(kit, page_size=60, max_pages=2)
                 if df is None or getattr(df, "empty", True):
@@ -134,10 +312,22 @@ def create_app():
             except Exception as e:
                 return (f"Failed to load data: {e}", gr.update(interactive=False), None)
 
+        def _stream_images(kit_id, df, size=(1024, 1024)):
+            # The GenAI image is guided by the weather plot, so the two can't run in
+            # parallel; show the plot as soon as it's ready instead of after both
+            key = _data_cache_key(size, kit_id, df)
+            left = load_weather_plot(size, kit_id=kit_id, df=df)
+            cached = _genai_cache_get(key)
+            if cached is not None:
+                yield left, cached
+                return
+            yield left, _placeholder_image(size, "Generating GenAI image...")
+            yield left, load_genai_output_from_image(left, size, cache_key=key)
+
         # Manual refresh button
         refresh_btn = gr.Button("Refresh")
         refresh_btn.click(
-            fn=get_both_images,
+            fn=_stream_images,
             inputs=[kit_input, df_state],
             outputs=[left_img, right_img],
         )
@@ -151,7 +341,7 @@ def create_app():
                 outputs=[status_md, refresh_btn, df_state],
             )
             .then(
-                fn=get_both_images,
+                fn=_stream_images,
                 inputs=[kit_input, df_state],
                 outputs=[left_img, right_img],
             )
@@ -167,6 +357,8 @@ def create_app():
             )
         )
 
+    # Handlers block on network I/O, not the GIL, so threads overlap them fine
+    app.queue(default_concurrency_limit=HANDLER_CONCURRENCY)
     return app
 
 
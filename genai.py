@@ -1,14 +1,86 @@
 from dotenv import load_dotenv
-from PIL import Image
-from typing import Optional
+from PIL import Image, UnidentifiedImageError, features
+from typing import TYPE_CHECKING, List, Optional, Sequence
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from pathlib import Path
+from functools import lru_cache
+import hashlib
+import json
+import mimetypes
+import os
+import random
+import threading
 import time
 
-load_dotenv()  # take environment variables from .env.
+if TYPE_CHECKING:
+    from google.genai import Client, types
 
-from google import genai
 
-client = genai.Client()
+@lru_cache(maxsize=1)
+def _get_client() -> "Client":
+    """Build the GenAI client on first use rather than at import.
+
+    Importing google.genai and resolving credentials is slow, and importers
+    that never generate anything shouldn't pay for it. Failures are not cached.
+    The transport speaks HTTP/2 so concurrent requests (generate_genai_images,
+    parallel app handlers) share one TLS connection.
+    """
+    load_dotenv()  # take environment variables from .env.
+    import httpx
+    from google import genai
+    from google.genai import types
+
+    transport_args = {
+        "http2": True,
+        "limits": httpx.Limits(max_connections=20, max_keepalive_connections=20),
+    }
+    return genai.Client(
+        http_options=types.HttpOptions(
+            client_args=transport_args,
+            async_client_args=transport_args,
+        )
+    )
+
+
+class PermanentGenAIError(Exception):
+    """A well-formed response that asking again won't change (e.g. a blocked
+    prompt or an answer without an image)."""
+
+
+def _is_retryable(e: Exception) -> bool:
+    """Allowlist of transient failures; everything else fails on the first try.
+
+    Retried: network errors and timeouts, API errors with status 429 or 5xx, and
+    an image payload that was present but didn't decode (truncated transfer).
+    Programming/SDK validation errors and permanent responses are not.
+    """
+    import httpx
+    from google.genai import errors
+
+    if isinstance(e, (httpx.TransportError, ConnectionError, TimeoutError, UnidentifiedImageError)):
+        return True
+    if isinstance(e, errors.APIError):
+        return e.code == 429 or e.code >= 500
+    return False
+
+
+def _retry(fn, attempts: int = 5):
+    """Call fn() up to attempts times, backing off exponentially with jitter.
+
+    Waits 0.5, 1, 2, 4 s (+ up to 0.25 s) between tries. Non-retryable errors
+    and the last failure are re-raised.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == attempts or not _is_retryable(e):
+                raise
+            print(f"GenAI attempt {attempt}/{attempts} failed, retrying: {e}")
+            time.sleep(min(0.5 * 2 ** (attempt - 1), 8) + random.uniform(0, 0.25))
+
 
 # Default creative prompt
 
@@ -22,8 +94,42 @@ Consisting of a dinner with performative, post-natural and bio-digital artworks
 This residency acted as both a research and development residency and an opportunity to try a recently developed curatorial approach of integrating, artworks, scientific findings, storytelling and performance into a multi-course themed dinner, using exclusively locally sourced foods.
 """
 
+# Art styles picked so far, keyed by sha256(model, description); persisted so a
+# restart doesn't repeat the round-trip for a description that hasn't changed
+ARTSTYLE_CACHE_PATH = Path("output/artstyle_cache.json")
+ARTSTYLE_CACHE_MAX_AGE = 7 * 24 * 60 * 60  # seconds before saved styles are asked for again
+_ARTSTYLE_CACHE: Optional[dict] = None
+
+
+def _artstyle_cache() -> dict:
+    global _ARTSTYLE_CACHE
+    if _ARTSTYLE_CACHE is None:
+        _ARTSTYLE_CACHE = {}
+        try:
+            if time.time() - ARTSTYLE_CACHE_PATH.stat().st_mtime < ARTSTYLE_CACHE_MAX_AGE:
+                _ARTSTYLE_CACHE = json.loads(ARTSTYLE_CACHE_PATH.read_text())
+        except (OSError, ValueError):
+            pass
+    return _ARTSTYLE_CACHE
+
+
 def pick_artstyle(description=description, model: str = "gemini-2.5-flash-image-preview") -> str:
-    client = genai.Client()
+    """Ask the model for a two-word art style fitting description.
+
+    Successful answers are memoized per (description, model), in memory and in
+    ARTSTYLE_CACHE_PATH; failures are not, so a later call can still succeed.
+    A file older than ARTSTYLE_CACHE_MAX_AGE is ignored and rewritten.
+    """
+    key = hashlib.sha256(f"{model}\0{description}".encode()).hexdigest()
+    cache = _artstyle_cache()
+    if key in cache:
+        return cache[key]
+
+    try:
+        client = _get_client()
+    except Exception as e:
+        print(f"GenAI client unavailable: {e}")
+        return None
     prompt = f""" '{description}'
     read this project description, and choose an artistic style to represent it with.
     Respond only with two words.
@@ -88,15 +194,13 @@ def pick_artstyle(description=description, model: str = "gemini-2.5-flash-image-
     International Style"""
 
     try:
-        response = client.models.generate_content(
-            model=model,
-            contents=[prompt],
-        )
+        response = _retry(lambda: client.models.generate_content(model=model, contents=[prompt]))
     except Exception as e:
         # No credentials or API issue
         print(f"GenAI request failed: {e}")
         return None
     
+    art_style = None
     try:
         for part in response.candidates[0].content.parts:
             if getattr(part, "text", None) is not None:
@@ -108,6 +212,16 @@ def pick_artstyle(description=description, model: str = "gemini-2.5-flash-image-
         print(f"pick_artstyle: Failed to parse GenAI response: {e}")
         return prompt
 
+    if not art_style:
+        return art_style
+    cache[key] = art_style
+    try:
+        ARTSTYLE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ARTSTYLE_CACHE_PATH.with_suffix(".tmp")
+        tmp.write_text(json.dumps(cache, indent=2))
+        os.replace(tmp, ARTSTYLE_CACHE_PATH)
+    except OSError:
+        pass
     return art_style
 
 art_style = "eastern"
@@ -119,6 +233,99 @@ def gen_default_prompt(art_style = art_style) -> str:
 
 DEFAULT_PROMPT = gen_default_prompt()
 
+# Generated images keyed by sha256(model, prompt, input image); survives restarts
+CACHE_DIR = Path("output/cache")
+CACHE_MAX_FILES = 256  # least recently used files beyond this are deleted
+
+# Decoded results for the same keys, in front of the disk cache; most recently used last
+_MEMORY_CACHE: "OrderedDict[str, Image.Image]" = OrderedDict()
+_MEMORY_CACHE_SIZE = 32
+_MEMORY_CACHE_LOCK = threading.Lock()  # generate_genai_images and app handlers share it
+
+
+def _cache_key(prompt: str, img: Image.Image, model: str) -> str:
+    h = hashlib.sha256()
+    h.update(f"{model}\0{prompt}\0{img.mode}\0{img.size}\0".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def _decode_rgb(fp) -> Image.Image:
+    """Decode an image fully, converting to RGB only when it isn't already.
+
+    load() runs the decoder now so the source buffer/file can be released, and
+    skipping convert() for RGB payloads avoids a second full-size copy.
+    """
+    im = Image.open(fp)
+    im.load()
+    return im if im.mode == "RGB" else im.convert("RGB")
+
+
+def _memory_cache_put(key: str, img: Image.Image) -> None:
+    with _MEMORY_CACHE_LOCK:
+        _MEMORY_CACHE[key] = img
+        _MEMORY_CACHE.move_to_end(key)
+        if len(_MEMORY_CACHE) > _MEMORY_CACHE_SIZE:
+            _MEMORY_CACHE.popitem(last=False)
+
+
+def _cache_load(key: str) -> Optional[Image.Image]:
+    with _MEMORY_CACHE_LOCK:
+        cached = _MEMORY_CACHE.get(key)
+        if cached is not None:
+            _MEMORY_CACHE.move_to_end(key)
+    if cached is not None:
+        # copy so callers can't modify the cached image
+        return cached.copy()
+    path = next(CACHE_DIR.glob(f"{key}.*"), None)
+    if path is None:
+        return None
+    try:
+        img = _decode_rgb(path)
+        os.utime(path)  # mark as recently used for the sweep
+    except OSError:
+        return None
+    _memory_cache_put(key, img)
+    return img.copy()
+
+
+def _cache_store(key: str, data: bytes, mime_type: Optional[str]) -> None:
+    ext = mimetypes.guess_extension(mime_type or "") or ".png"
+    path = CACHE_DIR / f"{key}{ext}"
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # write-then-rename so a crash never leaves a truncated image behind;
+        # the dot prefix keeps the temp file out of _cache_load's "{key}.*" glob
+        tmp = CACHE_DIR / f".{key}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        files = sorted(
+            (p for p in CACHE_DIR.iterdir() if p.suffix != ".tmp"),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for old in files[:-CACHE_MAX_FILES]:
+            old.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def _encode_upload(img: Image.Image) -> "types.Part":
+    """Encode the guide image once for upload: WebP (quality 80), or JPEG
+    (quality 85) when Pillow was built without WebP support."""
+    from google.genai import types
+
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buf = BytesIO()
+    if features.check("webp"):
+        img.save(buf, format="WEBP", quality=80, method=4)
+        mime_type = "image/webp"
+    else:
+        img.save(buf, format="JPEG", quality=85)
+        mime_type = "image/jpeg"
+    return types.Part.from_bytes(data=buf.getvalue(), mime_type=mime_type)
+
+
 def generate_genai_image(
     input_image: Optional[Image.Image] = None,
     prompt: Optional[str] = None,
@@ -154,68 +361,82 @@ def generate_genai_image(
     # Prepare prompt
     ptxt = prompt or DEFAULT_PROMPT
 
-    output_image = None
-    last_error = None
-
-    # Retry up to 5 times, waiting 2 seconds between failed attempts
-    for attempt in range(1, 6):
+    # Identical prompt + input image: reuse the earlier result instead of calling the API
+    cache_key = _cache_key(ptxt, img, model)
+    output_image = _cache_load(cache_key)
+    if output_image is None:
         try:
-            response = client.models.generate_content(
-                model=model,
-                contents=[ptxt, img],
-            )
+            client = _get_client()
         except Exception as e:
-            last_error = e
-            # If not last attempt, wait and retry
-            if attempt < 5:
-                time.sleep(2)
-                continue
-            else:
-                print(f"GenAI request failed (attempt {attempt}/5): {e}")
-                break
+            # No credentials or SDK issue; retrying won't help
+            print(f"GenAI client unavailable: {e}")
+            return None
+        # Encode once for all attempts; WebP is ~10x smaller than the PNG the SDK would send
+        upload = _encode_upload(img)
+
+        def _attempt() -> Image.Image:
+            # Stream so text parts and the image arrive as soon as they are ready;
+            # a stream cut off midway raises and the whole attempt is retried
+            inline, block_reason = None, None
+            for chunk in client.models.generate_content_stream(
+                model=model,
+                contents=[ptxt, upload],
+            ):
+                feedback = getattr(chunk, "prompt_feedback", None)
+                if feedback is not None and feedback.block_reason:
+                    block_reason = feedback.block_reason
+                if not chunk.candidates or chunk.candidates[0].content is None:
+                    continue
+                for part in chunk.candidates[0].content.parts or ():
+                    if getattr(part, "text", None) is not None:
+                        # Optional: print any textual response
+                        print(part.text)
+                    elif getattr(part, "inline_data", None) is not None:
+                        inline = part.inline_data
+            if block_reason is not None:
+                raise PermanentGenAIError(f"prompt blocked: {block_reason}")
+            if inline is None:
+                raise PermanentGenAIError("GenAI response contained no image")
+            # A truncated payload raises UnidentifiedImageError and is retried
+            image = _decode_rgb(BytesIO(inline.data))
+            _cache_store(cache_key, inline.data, inline.mime_type)
+            _memory_cache_put(cache_key, image)
+            return image.copy()
 
         try:
-            # Reset on each attempt
-            output_image = None
-            for part in response.candidates[0].content.parts:
-                if getattr(part, "text", None) is not None:
-                    # Optional: print any textual response
-                    print(part.text)
-                elif getattr(part, "inline_data", None) is not None:
-                    output_image = Image.open(BytesIO(part.inline_data.data)).convert("RGB")
-            # Success condition
-            if output_image is not None:
-                break
+            output_image = _retry(_attempt)
         except Exception as e:
-            last_error = e
-            # Parsing failed; if not last attempt, wait and retry
-            if attempt < 5:
-                time.sleep(2)
-                continue
-            else:
-                print(f"Failed to parse GenAI response (attempt {attempt}/5): {e}")
-                break
-
-        # If we reached here with no image, wait then try again (unless last attempt)
-        if output_image is None and attempt < 5:
-            time.sleep(2)
+            print(f"GenAI image generation failed: {e}")
 
     # Optional save without using as a future fallback
     if output_image is not None and save_to_disk:
         try:
-            import os
-
             os.makedirs("output", exist_ok=True)
             output_image.save("output/generated_image.png")
         except Exception:
             pass
 
-    if output_image is None and last_error is not None:
-        # Keep return type unchanged; logging already printed above
-        pass
-
     return output_image
 
+
+def generate_genai_images(
+    input_images: Sequence[Optional[Image.Image]],
+    prompt: Optional[str] = None,
+    model: str = "gemini-2.5-flash-image-preview",
+    max_workers: int = 4,
+) -> List[Optional[Image.Image]]:
+    """Stylize several images with one prompt, issuing the requests concurrently.
+
+    Each image still needs its own generate_content call (the image model returns
+    one picture per response), but the calls overlap instead of queueing behind
+    each other. Results are in input order; failed entries are None.
+    """
+    if not input_images:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(input_images))) as ex:
+        return list(ex.map(lambda im: generate_genai_image(im, prompt=prompt, model=model), input_images))
+
+
 if __name__ == "__main__":
     DEFAULT_PROMPT = gen_default_prompt(pick_artstyle())
     print(DEFAULT_PROMPT)
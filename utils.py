@@ -4,27 +4,14 @@ Deprecated API shim.
 All API-related functions/constants moved to `api_call.py` to keep
 `utils.py` free of network concerns. Import directly from `api_call`.
 
-This module re-exports the public API for backward compatibility.
+This module re-exports the public API for backward compatibility. The
+re-exports resolve lazily (PEP 562), so `api_call` is only imported, and the
+deprecation warning only emitted, when one of them is first used.
 """
 from __future__ import annotations
 
 import warnings
 
-from api_call import (
-    BASE_URL,
-    HEADERS,
-    get_kit_info,
-    get_kit_measurements_df,
-    fetch_kit_dataframe,
-)
-
-warnings.warn(
-    "The API helpers were moved from utils.py to api_call.py. "
-    "Please import from 'api_call' going forward.",
-    DeprecationWarning,
-    stacklevel=2,
-)
-
 __all__ = [
     "BASE_URL",
     "HEADERS",
@@ -32,3 +19,24 @@ __all__ = [
     "get_kit_measurements_df",
     "fetch_kit_dataframe",
 ]
+
+
+def __getattr__(name: str):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import api_call
+
+    warnings.warn(
+        "The API helpers were moved from utils.py to api_call.py. "
+        "Please import from 'api_call' going forward.",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    # bind all re-exports at once so this hook (and the warning) runs only once
+    globals().update({n: getattr(api_call, n) for n in __all__})
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,17 +4,124 @@
 import os
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+import threading
+import matplotlib as mpl
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from scipy.ndimage import uniform_filter1d
 from PIL import Image
-from typing import Optional
-from api_call import get_kit_measurements_df
+from typing import Optional, Sequence, Tuple
+from api_call import fetch_kit_dataframe
+
+# Figure DPI for the in-memory render (8x8 in -> 800x800 px by default)
+RENDER_DPI = 100
+
+# One Figure/polar Axes/canvas per thread, cleared and reused for every render.
+# Built without pyplot, so nothing is registered globally and concurrent app
+# handlers never share (or close) each other's figure.
+_local = threading.local()
+
+
+def _figure() -> Tuple[Figure, "mpl.axes.Axes", FigureCanvas]:
+    if not hasattr(_local, "fig"):
+        fig = Figure(figsize=(8, 8))
+        _local.canvas = FigureCanvas(fig)
+        _local.ax = fig.add_subplot(111, projection="polar")
+        _local.fig = fig
+    return _local.fig, _local.ax, _local.canvas
+
+
+OUTPUT_DIR = "output"
+
+# Sensors feeding the mandala, in the column order _mandala_geometry expects
+SENSOR_COLUMNS = ('ftTemp', 'gbHum', 'NH3', 'C3H8', 'CO')
+# Radius blend: temp (outer breathing), humidity (inner swell), light (diurnal bloom).
+# Only these columns take part, so gaps in the other sensors can't leak NaN into it
+_RADIUS_COLUMNS = [0, 1, 4]
+_RADIUS_WEIGHTS = np.array([0.5, 0.3, 0.2])
+_RING_FREQS = np.array([3, 7, 13])[:, None]
+
+
+def _smooth(x: np.ndarray, k: int = 21, axis: int = -1) -> np.ndarray:
+    """Rolling mean. uniform_filter1d is a running sum (O(N) rather than O(N*k)
+    for np.convolve); mode="constant" zero-pads like np.convolve(mode="same"),
+    so the ring ends taper as before.
+
+    A running sum would carry a NaN into every later output, so gaps are
+    filtered as zeros and then blanked again over their k-wide window, as
+    np.convolve did.
+    """
+    if k < 3:
+        return x
+    gaps = np.isnan(x)
+    out = uniform_filter1d(np.where(gaps, 0.0, x), size=k, axis=axis, mode="constant")
+    if gaps.any():
+        # the window mean of the gap mask is a multiple of 1/k; > half a step
+        # ignores the running sum's rounding residue
+        near_gap = uniform_filter1d(gaps.astype(float), size=k, axis=axis, mode="constant")
+        out[near_gap > 0.5 / k] = np.nan
+    return out
+
+
+def _mandala_geometry(cols: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """Map an (N, 5) sensor matrix (SENSOR_COLUMNS order) to plot geometry.
+
+    Returns (theta, radius_smooth, rings, stroke, dots): angles map to time,
+    radii encode a blended metric, stroke width and dot size the other sensors.
+    Each stage is one vectorized pass over the whole matrix, updating in place
+    where possible.
+    """
+    # Angles map to time
+    theta = np.linspace(0, 2 * np.pi, len(cols), endpoint=False)
+
+    # Min-max normalize all five sensors at once, column-wise; flat columns become 0
+    lo = np.nanmin(cols, axis=0)
+    span = np.nanmax(cols, axis=0) - lo
+    flat = span == 0
+    normed = cols - lo
+    normed /= np.where(flat, 1.0, span)
+    normed[:, flat] = 0.0
+
+    # Radius blends temp, humidity and light in one matrix-vector product
+    radius = normed[:, _RADIUS_COLUMNS] @ _RADIUS_WEIGHTS
+    radius *= 0.35
+    radius += 0.45
+
+    # Stroke width from wind; point size from rainfall intensity
+    stroke = 0.3 + 3.2*normed[:, 3]
+    dots = 5 + 60*normed[:, 2]
+
+    radius_smooth = _smooth(radius, k=31)
+    # Inner filigree rings: all three built and smoothed as one (3, N) array
+    rings = np.sin(_RING_FREQS * theta[None, :])
+    rings *= 0.05
+    rings += 0.85
+    rings *= radius[None, :]
+    rings = _smooth(rings, k=15)
+    return theta, radius_smooth, rings, stroke, dots
+
+
+def _save_png(fig: Figure, path: str) -> None:
+    # 300 dpi print resolution, independent of the in-memory RENDER_DPI
+    fig.savefig(path, dpi=300, bbox_inches="tight", pad_inches=0.05, pil_kwargs={"optimize": True})
+
+
+def _save_svg(fig: Figure, path: str) -> None:
+    # savefig hands SVG straight to the SVG backend (no Agg pass) and restores
+    # the figure's Agg canvas afterwards, which the per-thread reuse relies on
+    fig.savefig(path, format="svg", bbox_inches="tight", pad_inches=0.05)
+
+
+_SAVERS = {"png": _save_png, "svg": _save_svg}
 
 
 def weather_data_visualisation(
     kit: int = 1001,
     save_to_disk: bool = False,
     df: Optional[pd.DataFrame] = None,
+    size: Optional[Tuple[int, int]] = None,
+    formats: Sequence[str] = ("png", "svg"),
 ) -> Image.Image:
     """Generates a 'Monsoon Mandala' visualization from weather data.
 
@@ -22,71 +129,61 @@ def weather_data_visualisation(
         kit: The kit ID to fetch data for, if df is not provided.
         save_to_disk: Whether to save the output image to disk.
         df: An optional DataFrame with pre-loaded weather data. If None, data will be fetched.
+        size: Optional (width, height) in pixels to render at directly. Defaults to an 8x8 inch figure.
+        formats: File formats written when save_to_disk is True ("png" and/or "svg").
 
     Returns:
         A PIL.Image object of the generated visualization.
+
+    Raises:
+        ValueError: If formats names an unsupported file format, or no data is available.
     """
-    # If no DataFrame is provided, fetch the data using the kit ID
+    unsupported = [fmt for fmt in formats if fmt not in _SAVERS]
+    if unsupported:
+        raise ValueError(f"Unsupported output format(s) {unsupported}; expected any of {sorted(_SAVERS)}")
+
+    # If no DataFrame is provided, fetch the data using the kit ID (reuses a
+    # recently fetched frame for the same kit)
     if df is None:
-        df = get_kit_measurements_df(kit)
+        df = fetch_kit_dataframe(kit)
 
     # If data is still unavailable, return a placeholder or raise an error
     if df is None or df.empty:
         raise ValueError(f"No data available for kit {kit}")
 
     # --- Data cleaning and pivoting ---
-    # Drop columns that are not needed for the visualization (new API df has no _raw)
-    df.drop(columns=['kit_id', "unit"], inplace=True, errors='ignore')
-    df.dropna(inplace=True)
-    
-    # Ensure the index is a datetime object before pivoting
-    if not isinstance(df.index, pd.DatetimeIndex):
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df.set_index('timestamp', inplace=True)
-        
-    df = df.pivot(columns='sensor', values='value')
+    # Select only the columns the plot needs (a new frame: callers such as the app
+    # reuse theirs afterwards), drop incomplete rows, then pivot to one column per
+    # sensor. Frames already indexed by time are pivoted on that index.
+    indexed = isinstance(df.index, pd.DatetimeIndex)
+    df = df.loc[:, ['sensor', 'value'] if indexed else ['timestamp', 'sensor', 'value']].dropna()
+    if indexed:
+        df = df.pivot(columns='sensor', values='value')
+    else:
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True, format="ISO8601")
+        df = df.pivot(index='timestamp', columns='sensor', values='value')
 
     # Ensure required columns exist (fill with zeros if missing)
-    for col in ['ftTemp', 'gbHum', 'NH3', 'C3H8', 'CO']:
+    for col in SENSOR_COLUMNS:
         if col not in df.columns:
             df[col] = 0.0
 
     # ---- Mapping to polar "Monsoon Mandala" ----
-    # Angles map to time; radii encode a blended metric; thickness & dot size encode other variables.
-    theta = np.linspace(0, 2 * np.pi, len(df), endpoint=False)
-
-    # Normalize helpers (avoid specifying colors, per instructions).
-    def norm(x):
-        x = np.asarray(x)
-        if np.nanmax(x) - np.nanmin(x) == 0:
-            return np.zeros_like(x)
-        return (x - np.nanmin(x)) / (np.nanmax(x) - np.nanmin(x))
-
-    T = norm(df['ftTemp'].values)
-    H = norm(df['gbHum'].values)
-    R = norm(df['NH3'].values)
-    W = norm(df['C3H8'].values)
-    L = norm(df['CO'].values)
-
-    # Radius combines temp (outer breathing), humidity (inner swell), light (diurnal bloom)
-    radius = 0.45 + 0.35*(0.5*T + 0.3*H + 0.2*L)
-
-    # Stroke width from wind; point size from rainfall intensity
-    stroke = 0.3 + 3.2*W
-    dots = 5 + 60*R
-
-    # Rolling medians for smooth rings
-    def smooth(x, k=21):
-        if k < 3: 
-            return x
-        w = np.ones(k)/k
-        return np.convolve(x, w, mode="same")
-
-    radius_smooth = smooth(radius, k=31)
+    # (avoid specifying colors, per instructions)
+    cols = df[list(SENSOR_COLUMNS)].to_numpy(dtype=np.float64)
+    theta, radius_smooth, rings, stroke, dots = _mandala_geometry(cols)
 
     # ---- Plot (no explicit colors; uses matplotlib defaults) ----
-    fig = plt.figure(figsize=(8, 8))
-    ax = plt.subplot(111, projection="polar")
+    fig, ax, canvas = _figure()
+    # Explicit DPI so a matplotlibrc with a high figure.dpi can't inflate the
+    # in-memory render; the 300 dpi print resolution is only used for saving
+    if size is None:
+        fig.set_size_inches(8, 8)
+    else:
+        # Render straight at the requested pixel size so callers needn't resize
+        fig.set_size_inches(size[0] / RENDER_DPI, size[1] / RENDER_DPI)
+    fig.set_dpi(RENDER_DPI)
+    ax.clear()
     ax.set_theta_direction(-1)         # clockwise
     ax.set_theta_offset(np.pi/2.0)     # start at top
     ax.set_axis_off()
@@ -94,38 +191,66 @@ def weather_data_visualisation(
     # Outer ribbon
     ax.plot(theta, radius_smooth, linewidth=2.0)
 
-    # Inner filigree rings
-    for k in [3, 7, 13]:
-        ax.plot(theta, smooth(radius * (0.85 + 0.05*np.sin(k*theta)), k=15), linewidth=0.8)
+    # Colors in line-cycle order: ribbon C0, then the rings, then the wind ticks,
+    # matching what one plot() call per line used to produce
+    cycle = mpl.rcParams["axes.prop_cycle"].by_key()["color"]
+    next_color = len(ax.lines)
+
+    def cycle_colors(n):
+        nonlocal next_color
+        colors = [cycle[(next_color + i) % len(cycle)] for i in range(n)]
+        next_color += n
+        return colors
+
+    # Inner filigree rings, drawn as a single collection sharing theta
+    ax.add_collection(LineCollection(
+        np.stack([np.broadcast_to(theta, rings.shape), rings], axis=-1),
+        linewidths=0.8,
+        colors=cycle_colors(len(rings)),
+        capstyle="projecting",
+        joinstyle="round",
+    ))
 
     # Rainfall pearls
     ax.scatter(theta[::3], (radius_smooth*0.92)[::3], s=dots[::3], alpha=0.6)
 
-    # Wind tick marks (radial sticks)
-    for th, rr, sw in zip(theta[::12], radius_smooth[::12], stroke[::12]):
-        ax.plot([th, th], [rr*0.75, rr*0.98], linewidth=sw*0.12, alpha=0.8)
+    # Wind tick marks (radial sticks), drawn as one collection
+    tick_th, tick_r = theta[::12], radius_smooth[::12]
+    segments = np.stack(
+        [np.column_stack([tick_th, tick_r*0.75]), np.column_stack([tick_th, tick_r*0.98])],
+        axis=1,
+    )
+    ticks = LineCollection(
+        segments,
+        linewidths=stroke[::12]*0.12,
+        colors=cycle_colors(len(segments)),
+        alpha=0.8,
+        capstyle="projecting",
+    )
+    ax.add_collection(ticks)
 
-    plt.tight_layout()
+    # Fixed layout instead of tight_layout(): with the axis off, the solver only ever
+    # pads the single axes by its default 1.08 font sizes, so place it directly
+    # and skip the extra bbox pass over every artist
+    w_in, h_in = fig.get_size_inches()
+    pad = 1.08 * mpl.rcParams["font.size"] / 72
+    ax.set_position([pad / w_in, pad / h_in, 1 - 2*pad / w_in, 1 - 2*pad / h_in])
 
     # Render figure to RGBA buffer and convert to PIL.Image
-    canvas = FigureCanvas(fig)
     canvas.draw()
     buf = np.asarray(canvas.buffer_rgba())
     pil_img = Image.fromarray(buf, mode="RGBA").convert("RGB")
 
     # Optionally also save to disk for compatibility with other tools
     if save_to_disk:
-        png_path = "output/monsoon_mandala_example.png"
-        svg_path = "output/monsoon_mandala_example.svg"
         try:
-            os.makedirs(os.path.dirname(png_path), exist_ok=True)
-            fig.savefig(png_path, dpi=300, bbox_inches="tight", pad_inches=0.05)
-            fig.savefig(svg_path, bbox_inches="tight", pad_inches=0.05)
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            for fmt in formats:
+                _SAVERS[fmt](fig, os.path.join(OUTPUT_DIR, f"monsoon_mandala_example.{fmt}"))
         except Exception:
             # If saving fails (e.g., directory missing), continue returning the PIL image
             pass
 
-    plt.close(fig)
     return pil_img
 
 